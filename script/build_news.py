@@ -1,19 +1,29 @@
 # scripts/build_news.py
-import os, re, json, time, math, hashlib, html
+import os, re, io, time, math, hashlib, html, threading, random, zlib, functools, sqlite3, heapq
+import xml.etree.ElementTree as ET
 from datetime import datetime, timezone, timedelta
 from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import feedparser
 import tldextract
-from bs4 import BeautifulSoup
 from dateutil import parser as dateparser
 import trafilatura
 import csv
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
 JST = timezone(timedelta(hours=9))
 FAST_MODE = os.getenv('NEWS_FAST_MODE') == '1'
+LLM_ONLY_MATCHED = os.getenv('NEWS_LLM_ONLY_MATCHED') == '1'
+# ヒューリスティックの星がこれ未満の記事は本文取得・LLM要約を省く（RSS要約をそのまま使う）。既定 0 = 全件要約
+try:
+    MIN_STARS_LLM = int(os.getenv('NEWS_MIN_STARS_LLM', '0'))
+except Exception:
+    MIN_STARS_LLM = 0
 try:
     GLOBAL_TIMEOUT_SEC = int(os.getenv('NEWS_GLOBAL_TIMEOUT_SEC', '60'))
 except Exception:
@@ -21,13 +31,43 @@ except Exception:
 ROOT = os.path.dirname(os.path.dirname(__file__))
 NEWS_DIR = os.path.join(ROOT, 'news')
 SOURCES_YAML = os.path.join(ROOT, 'sources.yaml')
+CACHE_DIR = os.getenv('NEWS_CACHE_DIR') or os.path.join(ROOT, '.cache')
 
 # --- utils -------------------------------------------------
 
 def log(*a):
     print('[build]', *a, flush=True)
 
+def write_bytes(path: str, data: bytes):
+    # 小さなJSONを書くだけなので open() のバッファ層を通さず、生のファイル記述子に直接書く
+    # 一時ファイルに書いてから os.replace で差し替え、途中で落ちても読み手に書きかけのファイルを見せない
+    # （一時ファイル名はプロセスごとに分け、同時実行された別プロセスと書きかけを取り合わない）
+    tmp = f'{path}.tmp.{os.getpid()}'
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        # 失敗時は一時ファイルを残さない（元のファイルはそのまま）
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+@functools.lru_cache(maxsize=8192)
 def canon_url(u: str) -> str:
+    # クエリもフラグメントも無ければ urlparse の往復は不要（大半のURL）
+    if '?' not in u:
+        # フラグメントだけなら切り落とせば足りる
+        if '#' in u:
+            u = u.split('#', 1)[0]
+        return u[:-1] if u.endswith('/') else u
     try:
         p = urlparse(u)
         # パラメータのutm等を削除
@@ -41,12 +81,110 @@ def canon_url(u: str) -> str:
     except Exception:
         return u
 
+# 同梱のPublic Suffix Listを使い、実行ごとのネットワーク取得を避ける
+_TLD = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=os.path.join(CACHE_DIR, 'tld'))
+
+# 同一ホストの記事が多いので、URLではなくホスト単位でメモ化する
+@functools.lru_cache(maxsize=2048)
+def _host_domain(netloc: str) -> str:
+    return _TLD(netloc).registered_domain
+
+# ホスト部だけ欲しいので urlparse の全分解はせず、scheme:// の直後を切り出す
+RE_NETLOC = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*://([^/?#]*)')
+
+def netloc_of(url: str) -> str:
+    m = RE_NETLOC.match(url)
+    return m.group(1) if m else urlparse(url).netloc
+
+def registered_domain(url: str) -> str:
+    return _host_domain(netloc_of(url))
+
+def domain_of(url: str) -> str:
+    netloc = netloc_of(url)
+    return _host_domain(netloc) or netloc
+
+@functools.lru_cache(maxsize=4096)
+def parse_dt(s: str) -> datetime:
+    """日時文字列のパース（ISO形式は高速パス、それ以外は dateutil にフォールバック）"""
+    try:
+        return datetime.fromisoformat(s)
+    except (TypeError, ValueError):
+        return dateparser.parse(s)
+
+RE_HTML_TAG = re.compile(r'<[^>]*>')
+
+def strip_html(s: str) -> str:
+    # RSSのsummaryは短い断片なのでDOMを組まずにタグ除去＋実体参照の復元で十分
+    if not s:
+        return ''
+    if '<' not in s and '&' not in s:
+        return ' '.join(s.split())
+    return ' '.join(html.unescape(RE_HTML_TAG.sub(' ', s)).split())
+
 SIM_THRESHOLD = 0.95  # 類似判定を厳しめにして間引き過多を抑制
 
 from difflib import SequenceMatcher
 
 def very_similar(a,b):
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio() >= SIM_THRESHOLD
+    a, b = a.lower(), b.lower()
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    # ratio() = 2*一致文字数/(la+lb) なので、短い方が全部一致しても届かなければ比較不要
+    if 2*min(la, lb) / (la + lb) < SIM_THRESHOLD:
+        return False
+    sm = SequenceMatcher(None, a, b)
+    # quick_ratio は ratio の上界なので安価に足切りできる
+    return sm.quick_ratio() >= SIM_THRESHOLD and sm.ratio() >= SIM_THRESHOLD
+
+# タイトル類似判定の候補絞り込み（3-gram MinHash + LSH バンド分割）
+# 同じバンドのシグネチャを共有するタイトル同士だけを very_similar で比較する
+MINHASH_BANDS = 12
+MINHASH_ROWS = 3
+_MINHASH_PRIME = (1 << 61) - 1
+_minhash_rng = random.Random(20240601)
+_MINHASH_PARAMS = [
+    (_minhash_rng.randrange(1, _MINHASH_PRIME), _minhash_rng.randrange(0, _MINHASH_PRIME))
+    for _ in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+
+def _title_minhash(title):
+    t = title.lower()
+    shingles = {t[i:i+3] for i in range(max(1, len(t) - 2))}
+    hs = [zlib.crc32(sh.encode('utf-8')) for sh in shingles]
+    return [min((a*h + b) % _MINHASH_PRIME for h in hs) for a, b in _MINHASH_PARAMS]
+
+def title_bands(title):
+    """LSHのバンドキー一覧。バンドを1つでも共有するタイトル同士だけが類似候補になる"""
+    sig = _title_minhash(title)
+    return [(b, tuple(sig[b*MINHASH_ROWS:(b+1)*MINHASH_ROWS])) for b in range(MINHASH_BANDS)]
+
+def prune_similar_titles(items, start_time):
+    """タイトルがほぼ同一の記事を先勝ちで間引く（GLOBAL_TIMEOUT_SEC 超過で打ち切り）"""
+    pruned = []
+    buckets = {}
+    for it in items:
+        bands = title_bands(it['title'])
+        checked = set()
+        dup = False
+        for band in bands:
+            for j in buckets.get(band, ()):
+                if j in checked:
+                    continue
+                checked.add(j)
+                if very_similar(it['title'], pruned[j]['title']):
+                    dup = True
+                    break
+            if dup:
+                break
+        if dup:
+            continue
+        for band in bands:
+            buckets.setdefault(band, []).append(len(pruned))
+        pruned.append(it)
+        if time.time() - start_time > GLOBAL_TIMEOUT_SEC:
+            break
+    return pruned
 
 UA = {
     # Modern UA to avoid Google Docs "browser not supported" fences
@@ -54,6 +192,22 @@ UA = {
     'Accept': 'text/csv,application/csv,text/plain;q=0.9,*/*;q=0.8'
 }
 
+# 全HTTP呼び出しで共有するセッション（keep-alive + コネクションプール）
+SESSION = requests.Session()
+SESSION.headers.update(UA)
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    # Retry-After には従わない（上限なしで待たされ日次ジョブが止まるため、backoff のみで再送）
+    # 再送しきった 4xx/5xx は例外にせず応答を返し、呼び出し側のステータス判定（リンク切れ判定など）に任せる
+    max_retries=Retry(
+        total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=False, raise_on_status=False
+    )
+)
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+
 # --- sources ----------------------------------------------
 
 def load_sources():
@@ -70,46 +224,221 @@ def load_sources():
 
 # --- fetch -------------------------------------------------
 
-def head_ok(url: str) -> bool:
+# HEAD拒否が多いSNSはリンク確認の対象外
+LINK_CHECK_SKIP_HOSTS = ('x.com', 'twitter.com', 'nitter.net')
+
+def skip_link_check(url: str) -> bool:
+    host = netloc_of(url).lower()
+    return any(h == host or host.endswith('.'+h) for h in LINK_CHECK_SKIP_HOSTS)
+
+
+# 条件付きGET用のキャッシュ: url -> {'etag', 'modified', 'items', 'fails', 'skip_until'}
+FEED_CACHE_PATH = os.path.join(CACHE_DIR, 'feeds.json')
+_feed_cache = None
+_feed_cache_lock = threading.Lock()
+# サーキットブレーカー: 連続で取得に失敗したフィードはしばらく問い合わせない（実行をまたいで feeds.json に保持）
+try:
+    FEED_BREAKER_FAILS = int(os.getenv('NEWS_FEED_BREAKER_FAILS', '3'))
+except Exception:
+    FEED_BREAKER_FAILS = 3
+try:
+    FEED_BREAKER_COOLOFF_HOURS = float(os.getenv('NEWS_FEED_BREAKER_COOLOFF_HOURS', '72'))
+except Exception:
+    FEED_BREAKER_COOLOFF_HOURS = 72.0
+
+def _load_feed_cache():
+    global _feed_cache
+    with _feed_cache_lock:
+        if _feed_cache is None:
+            try:
+                with open(FEED_CACHE_PATH, 'rb') as f:
+                    _feed_cache = orjson.loads(f.read())
+            except Exception:
+                _feed_cache = {}
+        return _feed_cache
+
+def save_feed_cache():
+    with _feed_cache_lock:
+        # 空になった場合も書き出す（ブレーカーの失敗回数がクリアされたことを残す）
+        if _feed_cache is None:
+            return
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            write_bytes(FEED_CACHE_PATH, orjson.dumps(_feed_cache))
+        except Exception as ex:
+            log('feed cache write err', ex)
+
+
+def _record_feed_result(url: str, ok: bool):
+    """取得結果をサーキットブレーカーの失敗回数に反映する（呼び出し側スレッドで実行）"""
+    cache = _load_feed_cache()
+    with _feed_cache_lock:
+        entry = cache.get(url)
+        if ok:
+            if entry and 'fails' in entry:
+                entry.pop('fails', None)
+                entry.pop('skip_until', None)
+                if not entry:
+                    del cache[url]
+            return
+        entry = cache.setdefault(url, {})
+        entry['fails'] = entry.get('fails', 0) + 1
+        if entry['fails'] >= FEED_BREAKER_FAILS:
+            entry['skip_until'] = time.time() + FEED_BREAKER_COOLOFF_HOURS * 3600
+            log('feed circuit open:', url, entry['fails'], 'consecutive failures')
+
+
+def fetch_feed_body(url: str):
+    """フィード本文の取得のみ（スレッドプールで並列実行する側）。
+
+    Returns: {'content': 本文bytes, 'content_type', 'etag', 'modified'}、
+             304 Not Modified なら {'not_modified': True}、
+             サーキットブレーカーで休止中なら {'skipped': True}、失敗時 None
+    デコードはせず生のbytesを返し、文字コード判定は feedparser に任せる。
+    """
+    headers = {}
+    cached = _load_feed_cache().get(url)
+    if cached and cached.get('skip_until', 0) > time.time():
+        log('feed skipped (circuit open):', url)
+        return {'skipped': True}
+    log('feed:', url)
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('modified'):
+            headers['If-Modified-Since'] = cached['modified']
     try:
-        # 一部SNS/大手はHEAD拒否が多い→許可ドメインは常にTrue
-        host = urlparse(url).netloc.lower()
-        allow_hosts = ['x.com', 'twitter.com', 'nitter.net']
-        if any(h == host or host.endswith('.'+h) for h in allow_hosts):
-            return True
-        if FAST_MODE:
-            return True
-        r = requests.head(url, headers=UA, timeout=8, allow_redirects=True)
-        if r.status_code >= 400:
-            # 一部サイトはHEAD拒否 → GETで再確認
-            r = requests.get(url, headers=UA, timeout=10, allow_redirects=True)
-        return 200 <= r.status_code < 400
+        rr = SESSION.get(url, headers=headers, timeout=8 if FAST_MODE else 15)
+        if rr.status_code == 304 and cached:
+            return {'not_modified': True}
+        rr.raise_for_status()
+        return {
+            'content': rr.content,
+            'content_type': rr.headers.get('Content-Type', ''),
+            'etag': rr.headers.get('ETag'),
+            'modified': rr.headers.get('Last-Modified'),
+        }
     except Exception:
-        return False
+        return None
 
 
-def fetch_feed(url: str):
-    log('feed:', url)
+# 単純なRSS/Atomは標準ライブラリの iterparse で直接読み、feedparser は扱えない形のときだけ使う
+# 子要素名（名前空間を除いたローカル名） -> feedparser のエントリキー
+FEED_ENTRY_TAGS = ('item', 'entry')
+FEED_FIELD_KEYS = {
+    'title': 'title',
+    'guid': 'id', 'id': 'id',
+    'pubDate': 'published', 'published': 'published', 'issued': 'published',
+    'updated': 'updated', 'modified': 'updated', 'date': 'updated',
+    'created': 'created',
+    'description': 'summary', 'summary': 'summary',
+}
+# 上の要素名をそのまま読んでよい名前空間（なし / Atom 1.0・0.3 / RSS 1.0 / Dublin Core）
+# media:title など他の名前空間の同名要素は feedparser の扱いが異なるので、出てきたら feedparser に任せる
+FEED_NAMESPACES = frozenset((
+    '',
+    'http://www.w3.org/2005/Atom',
+    'http://purl.org/atom/ns#',
+    'http://purl.org/rss/1.0/',
+    'http://purl.org/dc/elements/1.1/',
+    'http://purl.org/dc/terms/',
+))
+RE_CHARSET = re.compile(r'charset=["\']?([\w-]+)', re.I)
+# feedparser のサニタイズで中身ごと消える要素
+RE_UNSAFE_SUMMARY = re.compile(r'<\s*(script|style)', re.I)
+
+
+def _split_tag(tag):
+    """'{ns}name' -> (ns, name)。コメント等の文字列でないタグは ('', '')"""
+    if not isinstance(tag, str):
+        return '', ''
+    if tag[:1] == '{':
+        ns, _, name = tag[1:].partition('}')
+        return ns, name
+    return '', tag
+
+
+def _fast_feed_entries(content: bytes, content_type: str = ''):
+    """feedparser 互換の最小限のエントリ（title/link/id/日付/summary）を返す。
+    HTML入りのタイトル・script入りの要約・相対リンク・UTF-8以外の文字コード指定など、
+    feedparser の正規化と結果が変わりうるものは None を返して feedparser に任せる。
+    """
+    m = RE_CHARSET.search(content_type or '')
+    if m and m.group(1).lower().replace('_', '-') not in ('utf-8', 'utf8', 'us-ascii'):
+        return None
+    entries = []
+    try:
+        for _, el in ET.iterparse(io.BytesIO(content), events=('end',)):
+            ns, name = _split_tag(el.tag)
+            if name not in FEED_ENTRY_TAGS:
+                continue
+            if ns not in FEED_NAMESPACES:
+                return None
+            e = {}
+            for child in el:
+                ns, name = _split_tag(child.tag)
+                if name != 'link' and name not in FEED_FIELD_KEYS:
+                    continue
+                if ns not in FEED_NAMESPACES:
+                    # 拡張名前空間の title/description などは feedparser に任せる
+                    return None
+                if name == 'link':
+                    if 'link' in e:
+                        continue
+                    href = child.get('href')
+                    if href is None:
+                        e['link'] = (child.text or '').strip()
+                    elif child.get('rel', 'alternate') == 'alternate':
+                        e['link'] = href.strip()
+                    continue
+                key = FEED_FIELD_KEYS[name]
+                if key in e:
+                    continue
+                if len(child):
+                    # xhtml などの入れ子要素は feedparser の整形に任せる
+                    return None
+                e[key] = (child.text or '').strip()
+            el.clear()
+            title = e.get('title', '')
+            summary = e.get('summary')
+            link = e.get('link') or e.get('id') or ''
+            if ('<' in title or summary is None or RE_UNSAFE_SUMMARY.search(summary)
+                    or (link and not link.startswith(('http://', 'https://')))):
+                return None
+            entries.append(e)
+    except ET.ParseError:
+        return None
+    return entries or None
+
+
+def parse_feed(url: str, body):
+    """取得済みのフィード本文をパース（CPU処理なので呼び出し側スレッドで直列実行する）"""
+    if body and body.get('skipped'):
+        return []
+    if body and body.get('not_modified'):
+        # 前回から変化なし → 前回パースした記事をそのまま使う
+        _record_feed_result(url, True)
+        items = [dict(it) for it in _load_feed_cache()[url]['items']]
+        for it in items:
+            it['_published_dt'] = parse_dt(it['published'])
+        return items
     d = None
     try:
-        if FAST_MODE:
-            rr = requests.get(url, headers=UA, timeout=8)
-            rr.raise_for_status()
-            d = feedparser.parse(rr.text)
+        if body is not None:
+            entries = _fast_feed_entries(body['content'], body['content_type'])
+            if entries is not None:
+                d = {'entries': entries}
+            else:
+                d = feedparser.parse(body['content'], response_headers={'content-type': body['content_type']})
         else:
-            rr = requests.get(url, headers=UA, timeout=15)
-            rr.raise_for_status()
-            d = feedparser.parse(rr.text)
-    except Exception:
-        # フォールバック: feedparserにURLを直接渡す（内部で取得）
-        try:
+            # フォールバック: feedparserにURLを直接渡す（内部で取得）
             d = feedparser.parse(url)
-        except Exception:
-            d = {'entries': []}
+    except Exception:
+        d = {'entries': []}
     if not d:
         d = {'entries': []}
     items = []
-    for e in d.entries:
+    for e in d.get('entries', []):
         title = e.get('title', '').strip()
         link = e.get('link') or e.get('id')
         if not title or not link:
@@ -120,24 +449,100 @@ def fetch_feed(url: str):
         for key in ['published', 'updated', 'created']:
             if e.get(key):
                 try:
-                    dt = dateparser.parse(e.get(key))
+                    dt = parse_dt(e.get(key))
                     break
                 except Exception:
                     pass
         if not dt:
             dt = datetime.now(timezone.utc)
         # summary
-        summary = BeautifulSoup(e.get('summary', ''), 'html.parser').get_text(' ', strip=True)
+        summary = strip_html(e.get('summary', ''))
+        dt = dt.astimezone(JST)
         items.append({
             'title': title,
             'url': link,
             'summary': summary,
-            'published': dt.astimezone(JST).isoformat(),
-            'source_name': tldextract.extract(link).registered_domain or urlparse(link).netloc,
+            'published': dt.isoformat(),
+            '_published_dt': dt,
+            'source_name': domain_of(link),
         })
+    # 本文取得にもURL直指定のフォールバックにも失敗したときだけ失敗として数える
+    _record_feed_result(url, body is not None or bool(items))
+    if body and (body.get('etag') or body.get('modified')):
+        cache = _load_feed_cache()
+        with _feed_cache_lock:
+            cache[url] = {
+                'etag': body.get('etag'),
+                'modified': body.get('modified'),
+                'items': [{k: v for k, v in it.items() if k != '_published_dt'} for it in items],
+            }
     return items
 
 
+def fetch_feed(url: str):
+    return parse_feed(url, fetch_feed_body(url))
+
+
+def fetch_feeds_parallel(urls, start_time):
+    """フィード取得をスレッドプールで並列化し、パースは完了順にこのスレッドで行う。
+
+    GLOBAL_TIMEOUT_SEC を超えたら未完了のフィードは諦める。結果は urls の順に並べて返す。
+    """
+    if not urls:
+        return []
+    try:
+        workers = int(os.getenv('NEWS_FEED_WORKERS', '12'))
+    except Exception:
+        workers = 12
+    parsed = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls))))
+    try:
+        futures = {pool.submit(fetch_feed_body, u): u for u in urls}
+        remaining = max(0.0, GLOBAL_TIMEOUT_SEC - (time.time() - start_time))
+        for fut in as_completed(futures, timeout=remaining):
+            u = futures[fut]
+            try:
+                parsed[u] = parse_feed(u, fut.result())
+            except Exception as ex:
+                log('feed err', u, ex)
+    except FuturesTimeoutError:
+        log('feed: global timeout reached,', len(urls) - len(parsed), 'feeds skipped')
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    out = []
+    for u in urls:
+        out.extend(parsed.get(u, []))
+    return out
+
+
+def _fetch_one_x_user(name, headers):
+    u = orjson.loads(SESSION.get(f'https://api.x.com/2/users/by/username/{name}', headers=headers, timeout=10).content)
+    uid = u.get('data',{}).get('id')
+    display = u.get('data',{}).get('name')
+    if not uid:
+        return []
+    t = orjson.loads(SESSION.get(
+        f'https://api.x.com/2/users/{uid}/tweets',
+        params={'max_results': 10, 'tweet.fields': 'created_at'},
+        headers=headers, timeout=10
+    ).content)
+    out = []
+    for tw in t.get('data', []):
+        url = f'https://x.com/{name}/status/{tw.get("id")}'
+        dt = parse_dt(tw.get('created_at')).astimezone(JST)
+        out.append({
+            'title': (tw.get('text') or '').split('\n')[0][:90],
+            'url': url,
+            'summary': tw.get('text') or '',
+            'published': dt.isoformat(),
+            '_published_dt': dt,
+            'source_name': 'x.com',
+            'author_handle': name,
+            'author_display': display
+        })
+    return out
+
+
 def fetch_x_api(usernames):
     token = os.getenv('X_BEARER_TOKEN')
     if not token:
@@ -147,58 +552,77 @@ def fetch_x_api(usernames):
     if not usernames:
         return []
     log('x api: users', usernames)
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'User-Agent': UA['User-Agent']
-    }
+    headers = {'Authorization': f'Bearer {token}'}
     out = []
-    for name in usernames:
-        try:
-            u = requests.get(f'https://api.x.com/2/users/by/username/{name}', headers=headers, timeout=10).json()
-            uid = u.get('data',{}).get('id')
-            display = u.get('data',{}).get('name')
-            if not uid:
-                continue
-            t = requests.get(
-                f'https://api.x.com/2/users/{uid}/tweets',
-                params={'max_results': 10, 'tweet.fields': 'created_at'},
-                headers=headers, timeout=10
-            ).json()
-            for tw in t.get('data', []):
-                url = f'https://x.com/{name}/status/{tw.get("id")}'
-                out.append({
-                    'title': (tw.get('text') or '').split('\n')[0][:90],
-                    'url': url,
-                    'summary': tw.get('text') or '',
-                    'published': dateparser.parse(tw.get('created_at')).astimezone(JST).isoformat(),
-                    'source_name': 'x.com',
-                    'author_handle': name,
-                    'author_display': display
-                })
-        except Exception as ex:
-            log('x api error', name, ex)
+    # ユーザーごとの lookup + tweets を並列実行し、結果は usernames の順に並べる
+    with ThreadPoolExecutor(max_workers=min(8, len(usernames))) as pool:
+        futures = [pool.submit(_fetch_one_x_user, name, headers) for name in usernames]
+        for name, fut in zip(usernames, futures):
+            try:
+                out.extend(fut.result())
+            except Exception as ex:
+                log('x api error', name, ex)
+    return out
+
+
+RE_NITTER_STATUS = re.compile(r'^https?://[^/]+/([^/]+)/status/(\d+).*')
+RE_X_HANDLE = re.compile(r'^https?://x\.com/([^/]+)/.*')
+
+
+def _x_rss_url(base, name):
+    return f"{base.rstrip('/')}/{name}/rss"
+
+
+def _x_rss_items(name, items):
+    out = []
+    for e in items:
+        # NitterのリンクをX公式に正規化
+        e['url'] = RE_NITTER_STATUS.sub(r'https://x.com/\1/status/\2', e['url'])
+        e['source_name'] = 'x.com'
+        e['author_handle'] = name
+        out.append(e)
     return out
 
 
 def fetch_x_rss(base, accounts):
     if not base or not accounts:
         return []
+    parsed = {}
+    # 取得は並列、パースは完了順にこのスレッドで直列に行う（GIL競合を避ける）。結果は accounts の順に並べる
+    with ThreadPoolExecutor(max_workers=min(8, len(accounts))) as pool:
+        futures = {pool.submit(fetch_feed_body, _x_rss_url(base, name)): i for i, name in enumerate(accounts)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            name = accounts[i]
+            try:
+                parsed[i] = _x_rss_items(name, parse_feed(_x_rss_url(base, name), fut.result()))
+            except Exception as ex:
+                log('x rss error', name, ex)
     out = []
-    for name in accounts:
-        url = f"{base.rstrip('/')}/{name}/rss"
-        try:
-            for e in fetch_feed(url):
-                # NitterのリンクをX公式に正規化
-                e['url'] = re.sub(r'^https?://[^/]+/([^/]+)/status/(\d+).*', r'https://x.com/\1/status/\2', e['url'])
-                e['source_name'] = 'x.com'
-                e['author_handle'] = name
-                out.append(e)
-        except Exception as ex:
-            log('x rss error', name, ex)
+    for i in range(len(accounts)):
+        out.extend(parsed.get(i, []))
     return out
 
 # --- google sheets -----------------------------------------
 
+def _try_sheet_csv(url: str, timeout_sec: int):
+    """1つのエクスポートURLを試し、URLらしきセルを含むCSVなら行のリストを返す（だめなら None）"""
+    log('sheet:', url)
+    # 本文は文字列に展開せず、行単位でそのまま csv.reader に流す
+    with SESSION.get(url, timeout=timeout_sec, allow_redirects=True, stream=True) as r:
+        r.raise_for_status()
+        ctype = (r.headers.get('Content-Type') or '').lower()
+        if 'text/html' in ctype and 'csv' not in ctype:
+            # likely a consent or unsupported-page; 他のエンドポイントに任せる（本文は読まずに閉じる）
+            return None
+        r.encoding = 'utf-8'
+        rows = list(csv.reader(r.iter_lines(decode_unicode=True)))
+    # Heuristic: at least 1 non-empty row with a URL-like cell
+    if any(any(('http://' in cell or 'https://' in cell) for cell in row) for row in rows):
+        return rows
+    return None
+
+
 def fetch_google_sheet_csv(sheet_id: str, gid: str|int = 0, timeout_sec: int = 20):
     # Try several export endpoints to bypass occasional HTML fences
     urls = [
@@ -207,24 +631,22 @@ def fetch_google_sheet_csv(sheet_id: str, gid: str|int = 0, timeout_sec: int = 2
         f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&gid={gid}"
     ]
     last_err = None
-    for url in urls:
-        log('sheet:', url)
-        try:
-            r = requests.get(url, headers=UA, timeout=timeout_sec, allow_redirects=True)
-            r.raise_for_status()
-            ctype = (r.headers.get('Content-Type') or '').lower()
-            if 'text/html' in ctype and 'csv' not in ctype:
-                # likely a consent or unsupported-page; try next
+    # 3つのエンドポイントを同時に試し、urls の優先順でCSVを返した最初のものを採用
+    # （遅い同意ページ待ちを直列に重ねない。型変換の入る gviz は export が失敗したときだけ使う）
+    pool = ThreadPoolExecutor(max_workers=len(urls))
+    try:
+        futures = [pool.submit(_try_sheet_csv, url, timeout_sec) for url in urls]
+        for fut in futures:
+            try:
+                rows = fut.result()
+            except Exception as ex:
+                last_err = ex
                 continue
-            r.encoding = 'utf-8'
-            text = r.text
-            rows = [row for row in csv.reader(text.splitlines())]
-            # Heuristic: at least 1 non-empty row with a URL-like cell
-            if any(any(('http://' in cell or 'https://' in cell) for cell in row) for row in rows):
+            if rows:
                 return rows
-        except Exception as ex:
-            last_err = ex
-            continue
+    finally:
+        # 残りの取得は待たずに戻る
+        pool.shutdown(wait=False, cancel_futures=True)
     if last_err:
         log('sheet err', last_err)
     return []
@@ -247,17 +669,19 @@ def rows_to_items_from_sheet(rows, mapping=None):
             dt = None
             if dt_raw:
                 try:
-                    dt = dateparser.parse(dt_raw)
+                    dt = parse_dt(dt_raw)
                 except Exception:
                     dt = None
             if not dt:
                 dt = datetime.now(timezone.utc)
-            src_name = 'x.com' if 'x.com/' in url or 'twitter.com/' in url else tldextract.extract(url).registered_domain
+            dt = dt.astimezone(JST)
+            src_name = 'x.com' if 'x.com/' in url or 'twitter.com/' in url else registered_domain(url)
             out.append({
                 'title': text.split('\n')[0][:90],
                 'url': url,
                 'summary': text,
-                'published': dt.astimezone(JST).isoformat(),
+                'published': dt.isoformat(),
+                '_published_dt': dt,
                 'source_name': src_name or 'sheet',
                 'author_handle': handle.lstrip() if handle else ''
             })
@@ -270,29 +694,68 @@ def load_manual_sns(path: str|Path):
     p = Path(path)
     if not p.exists():
         return []
-    text = p.read_text(encoding='utf-8')
     # TSV: date\thandle\ttext\tmedia_url(optional)\tpost_url
-    rows = []
-    for line in text.splitlines():
-        if not line.strip():
-            continue
-        parts = line.split('\t')
-        # fill to 5 columns
-        while len(parts) < 5:
-            parts.append('')
-        rows.append(parts)
-    return rows
+    with p.open('r', encoding='utf-8', newline='') as f:
+        # 引用符は解釈せず、行ごとにタブ区切りで読む（fill to 5 columns）
+        return [
+            row + [''] * (5 - len(row))
+            for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+            if any(c.strip() for c in row)
+        ]
+
+
+def _fetch_one_sheet(sheet):
+    rows = fetch_google_sheet_csv(sheet.get('id'), sheet.get('gid', 0))
+    return rows_to_items_from_sheet(rows, sheet.get('mapping'))
+
+
+def fetch_sheets_parallel(sheets):
+    if not sheets:
+        return []
+    out = []
+    # 取得は並列、結果は sheets の順に並べる
+    with ThreadPoolExecutor(max_workers=min(8, len(sheets))) as pool:
+        futures = [pool.submit(_fetch_one_sheet, s) for s in sheets]
+        for fut in futures:
+            try:
+                out.extend(fut.result())
+            except Exception as ex:
+                log('sheet fetch fail', ex)
+    return out
 
 # --- extraction -------------------------------------------
 
-def extract_text(url: str) -> str:
+def link_ok(url: str) -> bool:
+    """本文を取得しない記事のリンク確認。HTTP 4xx/5xx なら False（通信エラーは判定できないので True）"""
+    if FAST_MODE or skip_link_check(url):
+        return True
+    try:
+        r = SESSION.head(url, timeout=8, allow_redirects=True)
+        if r.status_code >= 400:
+            # 一部サイトはHEAD拒否 → GETで再確認（本文は読まない）
+            r = SESSION.get(url, timeout=10, allow_redirects=True, stream=True)
+            r.close()
+        if r.status_code >= 400:
+            _note_dead_status(url, r.status_code)
+            return False
+        return True
+    except Exception:
+        return True
+
+
+def extract_text(url: str):
+    """本文を抽出する。リンク切れ（HTTP 4xx/5xx）のときは None を返す"""
     try:
         if FAST_MODE:
             return ''
-        downloaded = trafilatura.fetch_url(url)
-        if not downloaded:
-            return ''
-        txt = trafilatura.extract(downloaded, include_comments=False, include_images=False, include_tables=False) or ''
+        # 本文取得のGETをリンク確認も兼ねて使い、事前のHEADプローブを省く
+        r = SESSION.get(url, timeout=10, allow_redirects=True)
+        if r.status_code >= 400:
+            if skip_link_check(url):
+                return ''
+            _note_dead_status(url, r.status_code)
+            return None
+        txt = trafilatura.extract(r.content, include_comments=False, include_images=False, include_tables=False) or ''
         return txt.strip()
     except Exception:
         return ''
@@ -335,6 +798,56 @@ KEYWORDS_GEOPOLITICS = r"(CHIPS法|\bCHIPS Act\b|輸出規制|\bexport control\b
 # 半導体全般（フォールバック）
 KEYWORDS_SEMI_GENERAL = r"(半導体|\bsemiconductor\b|\bchip\b|チップ|\bfab\b|製造|シリコン|\bsilicon\b)"
 
+# 分類軸ごとの (分野名, コンパイル済みパターン)。リスト順がそのまま判定の優先順位
+FIELD_PATTERNS = [
+    ('device', [
+        ('power', re.compile(KEYWORDS_POWER, re.I)),
+        ('memory', re.compile(KEYWORDS_MEMORY, re.I)),
+        ('logic', re.compile(KEYWORDS_LOGIC, re.I)),
+        ('analog', re.compile(KEYWORDS_ANALOG, re.I)),
+        ('image', re.compile(KEYWORDS_IMAGE, re.I)),
+    ]),
+    ('process', [
+        ('backend', re.compile(KEYWORDS_BACKEND, re.I)),
+        ('frontend', re.compile(KEYWORDS_FRONTEND, re.I)),
+        ('miniaturization', re.compile(KEYWORDS_MINIATURIZATION, re.I)),
+        ('equipment', re.compile(KEYWORDS_EQUIPMENT, re.I)),
+        ('wafer', re.compile(KEYWORDS_WAFER, re.I)),
+    ]),
+    ('market', [
+        ('ai', re.compile(KEYWORDS_AI_CHIP, re.I)),
+        ('automotive', re.compile(KEYWORDS_AUTOMOTIVE, re.I)),
+        ('datacenter', re.compile(KEYWORDS_DATACENTER, re.I)),
+        ('industrial', re.compile(KEYWORDS_INDUSTRIAL, re.I)),
+    ]),
+    ('industry', [
+        ('foundry', re.compile(KEYWORDS_FOUNDRY, re.I)),
+        ('fabless', re.compile(KEYWORDS_FABLESS, re.I)),
+        ('idm', re.compile(KEYWORDS_IDM, re.I)),
+        ('geopolitics', re.compile(KEYWORDS_GEOPOLITICS, re.I)),
+    ]),
+]
+RE_SEMI_GENERAL = re.compile(KEYWORDS_SEMI_GENERAL, re.I)
+# 軸ごとに全分野を名前付きグループの1本の選言にまとめ、1回の走査でヒットした分野を拾う
+FIELD_UNIONS = [
+    (axis, re.compile('|'.join(f'(?P<{name}>{rx.pattern})' for name, rx in patterns), re.I), patterns)
+    for axis, patterns in FIELD_PATTERNS
+]
+
+
+def _match_field(union, patterns, text):
+    """patterns の優先順で最初にマッチする分野名（なければ None）"""
+    hits = {m.lastgroup for m in union.finditer(text)}
+    if not hits:
+        return None
+    # finditer は重なったマッチを飛ばすので、見つかった最上位より優先度の高い分野だけ個別に確認する
+    for name, rx in patterns:
+        if name in hits:
+            return name
+        if rx.search(text):
+            return name
+    return None
+
 # 分野ラベルの日本語マッピング
 FIELD_LABELS = {
     'power': 'パワー半導体',
@@ -357,21 +870,66 @@ FIELD_LABELS = {
     'wafer': 'ウェーハ',
     'general': '半導体全般'
 }
+
+# 全分野のリスト（primary分類に使用される可能性のあるすべての分野）
+ALL_FIELDS = [
+    # デバイス種類
+    'power', 'memory', 'logic', 'analog', 'image',
+    # 市場用途
+    'ai', 'automotive', 'datacenter', 'industrial',
+    # 業界構造
+    'foundry', 'fabless', 'idm', 'geopolitics',
+    # 製造工程
+    'frontend', 'backend', 'miniaturization', 'equipment', 'wafer',
+    # 汎用
+    'general'
+]
+# 分野名 -> ALL_FIELDS 内の番号（分野別の振り分けをリストの添字で行う）
+FIELD_INDEX = {name: i for i, name in enumerate(ALL_FIELDS)}
+
 BIG_NAMES = [
     'OpenAI','Anthropic','Google','DeepMind','Microsoft','Meta','NVIDIA','Amazon','Apple','xAI','Mistral','Hugging Face'
 ]
+SURPRISE_WORDS = r"(突破|leak|爆|倍|破る|破竹|unprecedented|重大|障害|停止|重大脆弱性|過去最大)"
+
+# classify / score で毎回使うパターンはモジュール読み込み時に一度だけコンパイル
+RE_ENGINEER = re.compile(KEYWORDS_ENGINEER, re.I)
+RE_BIZ = re.compile(KEYWORDS_BIZ, re.I)
+RE_POLICY = re.compile(KEYWORDS_POLICY, re.I)
+RE_BIG_NAMES = re.compile('|'.join(map(re.escape, BIG_NAMES)), re.I)
+RE_SURPRISE = re.compile(SURPRISE_WORDS, re.I)
+
+
+def _item_text(item) -> str:
+    return f"{item.get('title') or ''} {item.get('summary') or ''}"
+
+
+def keyword_features(item, text=None) -> dict:
+    """classify / score 共通のキーワード判定。結果は item['_feat'] に保持して再走査を避ける"""
+    feat = item.get('_feat')
+    if feat is None:
+        if text is None:
+            text = _item_text(item)
+        feat = {
+            'engineer': bool(RE_ENGINEER.search(text)),
+            'biz': bool(RE_BIZ.search(text)),
+            'policy': bool(RE_POLICY.search(text)),
+            'big': bool(RE_BIG_NAMES.search(text)),
+            # サプライズ（脆弱性/大型発表/劇的比較などの単語）
+            'surprise': bool(RE_SURPRISE.search(text)),
+        }
+        item['_feat'] = feat
+    return feat
 
 
 def classify(item):
-    title = (item.get('title') or '')
-    s = (item.get('summary') or '')
-    text = f"{title} {s}"
+    feat = keyword_features(item)
     cat = []
-    if re.search(KEYWORDS_ENGINEER, text, re.I):
+    if feat['engineer']:
         cat.append('tools')
-    if re.search(KEYWORDS_BIZ, text, re.I):
+    if feat['biz']:
         cat.append('business')
-    if any(n.lower() in text.lower() for n in BIG_NAMES) or re.search(KEYWORDS_POLICY, text, re.I):
+    if feat['big'] or feat['policy']:
         cat.append('company')
     if 'x.com' in (item.get('source_name') or '') or 'twitter' in (item.get('source_name') or ''):
         cat.append('sns')
@@ -381,124 +939,343 @@ def classify(item):
     return cat
 
 
-def classify_field(item) -> dict:
+def classify_field(item, text=None) -> dict:
     """記事を半導体分野で分類（4分類）
     Returns: {'primary': str, 'device': str|None, 'process': str|None, 'market': str|None, 'industry': str|None}
     または半導体関連でない場合は None
     """
-    text = f"{item.get('title', '')} {item.get('summary', '')}"
+    if text is None:
+        text = _item_text(item)
     result = {'primary': None, 'device': None, 'process': None, 'market': None, 'industry': None}
 
-    # デバイス種類
-    if re.search(KEYWORDS_POWER, text, re.I):
-        result['device'] = 'power'
-    elif re.search(KEYWORDS_MEMORY, text, re.I):
-        result['device'] = 'memory'
-    elif re.search(KEYWORDS_LOGIC, text, re.I):
-        result['device'] = 'logic'
-    elif re.search(KEYWORDS_ANALOG, text, re.I):
-        result['device'] = 'analog'
-    elif re.search(KEYWORDS_IMAGE, text, re.I):
-        result['device'] = 'image'
-
-    # 製造工程
-    if re.search(KEYWORDS_BACKEND, text, re.I):
-        result['process'] = 'backend'
-    elif re.search(KEYWORDS_FRONTEND, text, re.I):
-        result['process'] = 'frontend'
-    elif re.search(KEYWORDS_MINIATURIZATION, text, re.I):
-        result['process'] = 'miniaturization'
-    elif re.search(KEYWORDS_EQUIPMENT, text, re.I):
-        result['process'] = 'equipment'
-    elif re.search(KEYWORDS_WAFER, text, re.I):
-        result['process'] = 'wafer'
-
-    # 市場用途
-    if re.search(KEYWORDS_AI_CHIP, text, re.I):
-        result['market'] = 'ai'
-    elif re.search(KEYWORDS_AUTOMOTIVE, text, re.I):
-        result['market'] = 'automotive'
-    elif re.search(KEYWORDS_DATACENTER, text, re.I):
-        result['market'] = 'datacenter'
-    elif re.search(KEYWORDS_INDUSTRIAL, text, re.I):
-        result['market'] = 'industrial'
-
-    # 業界構造
-    if re.search(KEYWORDS_FOUNDRY, text, re.I):
-        result['industry'] = 'foundry'
-    elif re.search(KEYWORDS_FABLESS, text, re.I):
-        result['industry'] = 'fabless'
-    elif re.search(KEYWORDS_IDM, text, re.I):
-        result['industry'] = 'idm'
-    elif re.search(KEYWORDS_GEOPOLITICS, text, re.I):
-        result['industry'] = 'geopolitics'
+    for axis, union, patterns in FIELD_UNIONS:
+        result[axis] = _match_field(union, patterns, text)
 
     # プライマリ分類の決定（優先順位: device > market > industry > process）
     result['primary'] = result['device'] or result['market'] or result['industry'] or result['process']
 
     # 半導体全般チェック（他の分類がない場合）
-    if not result['primary'] and re.search(KEYWORDS_SEMI_GENERAL, text, re.I):
+    if not result['primary'] and RE_SEMI_GENERAL.search(text):
         result['primary'] = 'general'
 
     return result if result['primary'] else None
 
 
+# 情報量拡充のため新しさウィンドウを可変に（デフォルト96h）
+try:
+    RECENCY_WINDOW_HOURS = float(os.getenv('NEWS_RECENCY_WINDOW_HOURS', '96'))
+except Exception:
+    RECENCY_WINDOW_HOURS = 96.0
+
+
 def score(item):
     now = datetime.now(JST)
     try:
-        dt = dateparser.parse(item.get('published')).astimezone(JST)
+        # 取り込み時にパース済みの datetime があれば再パースしない
+        dt = (item.get('_published_dt') or parse_dt(item.get('published'))).astimezone(JST)
     except Exception:
         dt = now
     age_h = (now - dt).total_seconds()/3600
-    # 情報量拡充のため新しさウィンドウを可変に（デフォルト96h）
-    try:
-        rec_hours = float(os.getenv('NEWS_RECENCY_WINDOW_HOURS', '96'))
-    except Exception:
-        rec_hours = 96.0
-    recency = max(0.0, 1.0 - min(age_h/rec_hours, 1.0))
-
-    t = (item.get('title') or '') + ' ' + (item.get('summary') or '')
-    engineer = 1.0 if re.search(KEYWORDS_ENGINEER, t, re.I) else 0.0
-    biz = 1.0 if re.search(KEYWORDS_BIZ, t, re.I) else 0.0
-    policy = 1.0 if re.search(KEYWORDS_POLICY, t, re.I) else 0.0
-    big = 1.0 if any(n.lower() in t.lower() for n in BIG_NAMES) else 0.0
+    recency = max(0.0, 1.0 - min(age_h/RECENCY_WINDOW_HOURS, 1.0))
 
-    # サプライズ（脆弱性/大型発表/劇的比較などの単語）
-    surprise = 1.0 if re.search(r"(突破|leak|爆|倍|破る|破竹|unprecedented|重大|障害|停止|重大脆弱性|過去最大)", t, re.I) else 0.0
+    feat = keyword_features(item)
+    engineer = 1.0 if feat['engineer'] else 0.0
+    biz_or_policy = 1.0 if (feat['biz'] or feat['policy']) else 0.0
+    big = 1.0 if feat['big'] else 0.0
+    surprise = 1.0 if feat['surprise'] else 0.0
 
-    base = 0.4*recency + 0.25*surprise + 0.2*big + 0.1*engineer + 0.05*(biz or policy)
+    base = 0.4*recency + 0.25*surprise + 0.2*big + 0.1*engineer + 0.05*biz_or_policy
     # 星（1〜5）
     stars = 1 + int(round(base*4))
     return base, min(max(stars,1),5)
 
+
+def analyze(item) -> dict:
+    """classify / classify_field / score を1回にまとめる（タイトル+要約の文字列は1度だけ組み立てる）"""
+    text = _item_text(item)
+    keyword_features(item, text)
+    base, stars = score(item)
+    return {'cats': classify(item), 'field': classify_field(item, text), 'score': base, 'stars': stars}
+
+# --- LLM cache --------------------------------------------
+# 要約結果を記事単位で SQLite に保存し、再実行時のLLM呼び出しを省く。
+# URL+タイトルの完全一致で外れた場合も、ほぼ同一タイトル（別URLでの転載など）の結果を再利用する。
+
+LLM_CACHE_DB = os.path.join(CACHE_DIR, 'llm.db')
+try:
+    LLM_CACHE_TTL_HOURS = float(os.getenv('NEWS_LLM_CACHE_TTL_HOURS', '168'))
+except Exception:
+    LLM_CACHE_TTL_HOURS = 168.0
+LLM_CACHE_INDEX_MAX = 2000
+# 本文取得・リンク確認で恒久的なリンク切れ（DEAD_LINK_STATUSES）だったURLは、この時間は再取得せずに落とす
+# 429/5xx など一時的なエラーはその回だけ落とし、記録はしない（次の実行で取り直す）
+DEAD_LINK_STATUSES = frozenset((403, 404, 410))
+# 日次cron（24h間隔）で前日の記録が確実に残るよう、既定は実行間隔より長い 48h
+# NEWS_FAST_MODE=1 では本文取得もリンク確認も行わないので、何も記録されない（ワークフローの既定設定）
+try:
+    DEAD_LINK_TTL_HOURS = float(os.getenv('NEWS_DEAD_LINK_TTL_HOURS', '48'))
+except Exception:
+    DEAD_LINK_TTL_HOURS = 48.0
+
+_llm_cache_lock = threading.Lock()
+_llm_cache_db = None
+_llm_cache_index = None  # cache_key -> title（近似一致の探索用、新しい順に最大 LLM_CACHE_INDEX_MAX 件）
+_llm_cache_values = {}  # cache_key -> 保存済みの結果（orjson bytes）。実行中の参照はSQLiteを引かずここで済ませる
+_llm_cache_buckets = {}  # LSHバンドキー -> [cache_key, ...]
+_dead_links = None  # url -> 記録時刻（リンク切れの否定キャッシュ）
+
+def _get_cache_key(title, url):
+    # 本文は抽出のたびに揺れるうえ、キーに含めると本文取得前にキャッシュを引けないため URL+タイトルで引く
+    return hashlib.sha1(f"{url}\0{title}".encode('utf-8')).hexdigest()
+
+def _cache_db():
+    # 呼び出し側で _llm_cache_lock を保持していること
+    global _llm_cache_db
+    if _llm_cache_db is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        db = sqlite3.connect(LLM_CACHE_DB, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('CREATE TABLE IF NOT EXISTS llm(k TEXT PRIMARY KEY, title TEXT, v BLOB, ts REAL)')
+        db.execute('CREATE INDEX IF NOT EXISTS llm_ts ON llm(ts)')
+        db.execute('CREATE TABLE IF NOT EXISTS dead(url TEXT PRIMARY KEY, ts REAL)')
+        _llm_cache_db = db
+    return _llm_cache_db
+
+def _cache_cutoff():
+    return time.time() - LLM_CACHE_TTL_HOURS * 3600
+
+def _index_cache_title(key, title, value):
+    # 呼び出し側で _llm_cache_lock を保持していること
+    _llm_cache_index[key] = title
+    _llm_cache_values[key] = value
+    for band in title_bands(title or ''):
+        _llm_cache_buckets.setdefault(band, []).append(key)
+
+def _load_cache_index():
+    # 呼び出し側で _llm_cache_lock を保持していること
+    global _llm_cache_index
+    if _llm_cache_index is None:
+        # 終了時に LLM_CACHE_INDEX_MAX 件まで刈り込んでいるので、有効な行は実質すべてここで読み込まれる
+        rows = _cache_db().execute(
+            'SELECT k, title, v FROM llm WHERE ts >= ? ORDER BY ts DESC LIMIT ?',
+            (_cache_cutoff(), LLM_CACHE_INDEX_MAX)
+        ).fetchall()
+        _llm_cache_index = {}
+        _llm_cache_values.clear()
+        _llm_cache_buckets.clear()
+        for key, title, value in rows:
+            _index_cache_title(key, title, value)
+    return _llm_cache_index
+
+def _read_cache_row(key):
+    with _llm_cache_lock:
+        _load_cache_index()
+        value = _llm_cache_values.get(key)
+    # 呼び出し側が結果を書き換えても共有されないよう、参照のたびにデコードする
+    return orjson.loads(value) if value is not None else None
+
+def _find_similar_cache_key(title):
+    """インデックス中のタイトルから SIM_THRESHOLD 以上の近似一致を探す（LSHバンドを共有する候補のみ比較）"""
+    bands = title_bands(title)
+    with _llm_cache_lock:
+        index = _load_cache_index()
+        keys = dict.fromkeys(k for band in bands for k in _llm_cache_buckets.get(band, ()))
+        candidates = [(k, index.get(k)) for k in keys]
+    for key, cached_title in candidates:
+        if very_similar(title, cached_title or ''):
+            return key
+    return None
+
+def _get_cached_llm_response(title, url):
+    try:
+        hit = _read_cache_row(_get_cache_key(title, url))
+        if hit is not None:
+            return hit
+        key = _find_similar_cache_key(title)
+        return _read_cache_row(key) if key else None
+    except Exception as ex:
+        log('llm cache read err', ex)
+        return None
+
+def _save_cached_llm_response(title, url, result):
+    key = _get_cache_key(title, url)
+    try:
+        value = orjson.dumps(result)
+        with _llm_cache_lock:
+            db = _cache_db()
+            db.execute('INSERT OR REPLACE INTO llm(k, title, v, ts) VALUES (?, ?, ?, ?)',
+                       (key, title, value, time.time()))
+            db.commit()
+            if key not in _load_cache_index():
+                _index_cache_title(key, title, value)
+            else:
+                _llm_cache_values[key] = value
+    except Exception as ex:
+        log('llm cache write err', ex)
+
+def _load_dead_links():
+    # 呼び出し側で _llm_cache_lock を保持していること
+    global _dead_links
+    if _dead_links is None:
+        cutoff = time.time() - DEAD_LINK_TTL_HOURS * 3600
+        _dead_links = dict(_cache_db().execute('SELECT url, ts FROM dead WHERE ts >= ?', (cutoff,)).fetchall())
+    return _dead_links
+
+def is_dead_link(url):
+    try:
+        with _llm_cache_lock:
+            return url in _load_dead_links()
+    except Exception as ex:
+        log('dead link cache read err', ex)
+        return False
+
+def _note_dead_status(url, status):
+    """リンク切れのステータスが恒久的なものなら否定キャッシュに記録する"""
+    if status in DEAD_LINK_STATUSES:
+        mark_dead_link(url)
+
+def mark_dead_link(url):
+    try:
+        now = time.time()
+        with _llm_cache_lock:
+            _load_dead_links()[url] = now
+            db = _cache_db()
+            db.execute('INSERT OR REPLACE INTO dead(url, ts) VALUES (?, ?)', (url, now))
+            db.commit()
+    except Exception as ex:
+        log('dead link cache write err', ex)
+
+def close_llm_cache():
+    """期限切れと LLM_CACHE_INDEX_MAX 件を超えた古い行を削除して閉じる"""
+    global _llm_cache_db, _llm_cache_index, _dead_links
+    with _llm_cache_lock:
+        if _llm_cache_db is None:
+            return
+        try:
+            db = _llm_cache_db
+            db.execute('DELETE FROM llm WHERE ts < ?', (_cache_cutoff(),))
+            db.execute('DELETE FROM llm WHERE k NOT IN (SELECT k FROM llm ORDER BY ts DESC LIMIT ?)',
+                       (LLM_CACHE_INDEX_MAX,))
+            db.execute('DELETE FROM dead WHERE ts < ?', (time.time() - DEAD_LINK_TTL_HOURS * 3600,))
+            db.commit()
+            db.close()
+        except Exception as ex:
+            log('llm cache close err', ex)
+        _llm_cache_db = None
+        _llm_cache_index = None
+        _dead_links = None
+        _llm_cache_values.clear()
+        _llm_cache_buckets.clear()
+
 # --- LLM summarization (optional) -------------------------
 # Priority: GOOGLE_API_KEY (Gemini, cheaper) > OPENAI_API_KEY
 
 _llm_warned = False
 
-def _build_prompt(title, text, url):
-    return f"""以下の記事を日本語で80文字以内に要約し、カテゴリ（business/tools/company/snsのいずれか）と、重要度を1〜5で出してください。出力はJSONのみ。
+try:
+    LLM_CONCURRENCY = max(1, int(os.getenv('NEWS_LLM_CONCURRENCY', '8')))
+except Exception:
+    LLM_CONCURRENCY = 8
+# 並列エンリッチ中でも同時に投げるLLMリクエスト数はこの上限に抑える（レート制限対策）
+_llm_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+
+LLM_RATE_LIMIT_RETRIES = 3
+
+def _llm_post(url, **kwargs):
+    # 429 はスロットを保持したままバックオフして再送（POSTはアダプタのRetry対象外のため）
+    with _llm_slots:
+        for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+            r = SESSION.post(url, **kwargs)
+            if r.status_code != 429 or attempt == LLM_RATE_LIMIT_RETRIES:
+                return r
+            try:
+                wait = float(r.headers.get('Retry-After') or 0)
+            except ValueError:
+                wait = 0.0
+            time.sleep(min(max(wait, 2 ** attempt), 10.0))
+        return r
+
+# 記事によらず不変の指示部は system 側に置き、可変の記事本文は user の末尾に置く
+# （プロンプトキャッシュは先頭一致のため、固定部分を先頭に揃えるとヒット率が上がる）
+SUMMARY_SYSTEM_PROMPT = """You are a concise Japanese news assistant. Output JSON only.
+記事を日本語で80文字以内に要約し、カテゴリ（business/tools/company/snsのいずれか）と、重要度を1〜5で出してください。
+出力形式: {"summary": "要約", "category": "business|tools|company|sns", "stars": 3}"""
+
+SUMMARY_BATCH_SYSTEM_PROMPT = """You are a concise Japanese news assistant. Output JSON only.
+各記事を日本語で80文字以内に要約し、カテゴリ（business/tools/company/snsのいずれか）と、重要度を1〜5で出してください。
+記事ごとに1オブジェクトを入力と同じ順で並べてください。
+出力形式: {"items": [{"id": 記事番号, "summary": "要約", "category": "business|tools|company|sns", "stars": 3}]}"""
+
+# Gemini の構造化出力用スキーマ（SUMMARY_BATCH_SYSTEM_PROMPT の出力形式と対応）
+SUMMARY_BATCH_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'items': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'id': {'type': 'INTEGER'},
+                    'summary': {'type': 'STRING'},
+                    'category': {'type': 'STRING', 'enum': ['business', 'tools', 'company', 'sns']},
+                    'stars': {'type': 'INTEGER'}
+                },
+                'required': ['id', 'summary', 'category', 'stars']
+            }
+        }
+    },
+    'required': ['items']
+}
 
-タイトル: {title}
+def _build_prompt(title, text, url):
+    return f"""タイトル: {title}
 URL: {url}
 本文: {text[:4000]}"""
 
-def _parse_llm_response(ans):
-    """Parse LLM response JSON"""
+def _build_batch_prompt(entries):
+    """複数記事を番号付きで並べたuserメッセージ"""
+    parts = []
+    for i, (title, text, url) in enumerate(entries, 1):
+        parts.append(f"## 記事{i}\n{_build_prompt(title, text, url)}\n")
+    return '\n'.join(parts)
+
+def _strip_code_fence(ans):
     # Remove markdown code blocks if present
     ans = ans.strip()
     if ans.startswith('```'):
         ans = '\n'.join(ans.split('\n')[1:])
     if ans.endswith('```'):
         ans = ans.rsplit('```', 1)[0]
-    ans = ans.strip()
-    j = json.loads(ans)
+    return ans.strip()
+
+def _normalize_llm_result(j):
     return {
         'blurb': j.get('summary') or j.get('要約') or j.get('blurb'),
         'category': j.get('category') or j.get('カテゴリ'),
         'stars': int(j.get('stars') or j.get('重要度') or 3)
     }
 
+def _parse_llm_response(ans):
+    """Parse LLM response JSON"""
+    j = orjson.loads(_strip_code_fence(ans))
+    return _normalize_llm_result(j)
+
+def _parse_llm_batch_response(ans, n):
+    """Parse batched LLM response JSON; returns a list of length n (None for missing ids)"""
+    j = orjson.loads(_strip_code_fence(ans))
+    rows = j.get('items', []) if isinstance(j, dict) else j
+    out = [None] * n
+    for pos, row in enumerate(rows):
+        if not isinstance(row, dict):
+            continue
+        try:
+            idx = int(row.get('id', pos + 1)) - 1
+        except Exception:
+            continue
+        if 0 <= idx < n:
+            out[idx] = _normalize_llm_result(row)
+    return out
+
 def _llm_gemini(title, text, url):
     """Gemini API (gemini-2.5-flash-lite)"""
     key = os.getenv('GOOGLE_API_KEY')
@@ -511,16 +1288,16 @@ def _llm_gemini(title, text, url):
             'temperature': 0.2,
             'responseMimeType': 'application/json'
         },
-        'systemInstruction': {'parts': [{'text': 'You are a concise Japanese news assistant. Output JSON only.'}]}
+        'systemInstruction': {'parts': [{'text': SUMMARY_SYSTEM_PROMPT}]}
     }
 
-    r = requests.post(
+    r = _llm_post(
         f'https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={key}',
         json=payload,
         timeout=45
     )
     r.raise_for_status()
-    ans = r.json()['candidates'][0]['content']['parts'][0]['text']
+    ans = orjson.loads(r.content)['candidates'][0]['content']['parts'][0]['text']
     return _parse_llm_response(ans)
 
 def _llm_openai(title, text, url):
@@ -533,14 +1310,14 @@ def _llm_openai(title, text, url):
     payload = {
         'model': model,
         'messages': [
-            {'role': 'system', 'content': 'You are a concise Japanese news assistant.'},
+            {'role': 'system', 'content': SUMMARY_SYSTEM_PROMPT},
             {'role': 'user', 'content': prompt}
         ],
         'temperature': 0.2
     }
-    r = requests.post(f'{base}/chat/completions', headers={'Authorization': f'Bearer {key}'}, json=payload, timeout=45)
+    r = _llm_post(f'{base}/chat/completions', headers={'Authorization': f'Bearer {key}'}, json=payload, timeout=45)
     r.raise_for_status()
-    ans = r.json()['choices'][0]['message']['content']
+    ans = orjson.loads(r.content)['choices'][0]['message']['content']
     return _parse_llm_response(ans)
 
 def llm_summarize(title, text, url):
@@ -585,6 +1362,95 @@ def llm_summarize(title, text, url):
     return None
 
 
+def _llm_openai_batch(entries):
+    """OpenAI API: 複数記事を1回のchat completionで要約"""
+    key = os.getenv('OPENAI_API_KEY')
+    model = os.getenv('OPENAI_MODEL') or 'gpt-4o-mini'
+    base = os.getenv('OPENAI_API_BASE') or 'https://api.openai.com/v1'
+    prompt = _build_batch_prompt(entries)
+
+    payload = {
+        'model': model,
+        'messages': [
+            {'role': 'system', 'content': SUMMARY_BATCH_SYSTEM_PROMPT},
+            {'role': 'user', 'content': prompt}
+        ],
+        'temperature': 0.2,
+        'response_format': {'type': 'json_object'}
+    }
+    r = _llm_post(f'{base}/chat/completions', headers={'Authorization': f'Bearer {key}'}, json=payload, timeout=90)
+    r.raise_for_status()
+    ans = orjson.loads(r.content)['choices'][0]['message']['content']
+    return _parse_llm_batch_response(ans, len(entries))
+
+def _llm_gemini_batch(entries):
+    """Gemini API: 複数記事を1回のgenerateContentで要約（responseSchemaで配列形式を固定）"""
+    key = os.getenv('GOOGLE_API_KEY')
+    model = os.getenv('GEMINI_MODEL') or 'gemini-2.5-flash-lite'
+    prompt = _build_batch_prompt(entries)
+
+    payload = {
+        'contents': [{'parts': [{'text': prompt}]}],
+        'generationConfig': {
+            'temperature': 0.2,
+            'responseMimeType': 'application/json',
+            'responseSchema': SUMMARY_BATCH_SCHEMA
+        },
+        'systemInstruction': {'parts': [{'text': SUMMARY_BATCH_SYSTEM_PROMPT}]}
+    }
+
+    r = _llm_post(
+        f'https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={key}',
+        json=payload,
+        timeout=90
+    )
+    r.raise_for_status()
+    ans = orjson.loads(r.content)['candidates'][0]['content']['parts'][0]['text']
+    return _parse_llm_batch_response(ans, len(entries))
+
+def llm_summarize_batch(entries):
+    """entries: [(title, text, url), ...] → 同じ順の [dict|None, ...]
+
+    まとめて1リクエストで要約し（Gemini優先、なければOpenAI）、応答が壊れていたときや欠けた記事は llm_summarize で個別に要約する。
+    HTTPエラー・タイムアウト（429/5xx含む）のときは個別要約でリクエストを増やさず、
+    もう一方のプロバイダのバッチを試し、それも失敗すればそのバッチは要約なしにする。
+    """
+    global _llm_warned
+
+    if not entries:
+        return []
+    google_key = os.getenv('GOOGLE_API_KEY')
+    openai_key = os.getenv('OPENAI_API_KEY')
+    if not (google_key or openai_key) or len(entries) == 1:
+        return [llm_summarize(*e) for e in entries]
+
+    providers = []
+    if google_key:
+        providers.append(('Gemini', os.getenv('GEMINI_MODEL') or 'gemini-2.5-flash-lite', _llm_gemini_batch))
+    if openai_key:
+        providers.append(('OpenAI', os.getenv('OPENAI_MODEL') or 'gpt-4o-mini', _llm_openai_batch))
+    for provider, model, batch_fn in providers:
+        try:
+            if not _llm_warned:
+                log(f'LLM: Using {provider} ({model}, batched)')
+                _llm_warned = True
+            results = batch_fn(entries)
+            break
+        except (orjson.JSONDecodeError, KeyError, IndexError, ValueError, TypeError) as ex:
+            # 応答の形が崩れていただけ（Gemini の空 candidates など）なら個別要約で取り直す
+            log(f'{provider} batch error (falling back to per-item):', type(ex).__name__, str(ex)[:100])
+            return [llm_summarize(*e) for e in entries]
+        except Exception as ex:
+            # requests.RequestException（429/5xx/タイムアウト）で個別に投げ直すとレート制限を悪化させる
+            # もう一方のプロバイダのバッチがあればそちらを1回だけ試す
+            log(f'{provider} batch error:', type(ex).__name__, str(ex)[:100])
+    else:
+        log('LLM batch failed on all providers (continuing without LLM)')
+        return [None] * len(entries)
+    # バッチ応答に含まれなかった記事だけ個別に再要約
+    return [r if r is not None else llm_summarize(*e) for r, e in zip(results, entries)]
+
+
 # --- Trends Analysis for Investors ---
 
 def _build_trends_prompt(articles_text: str, date: str) -> str:
@@ -666,13 +1532,13 @@ def _llm_gemini_trends(articles: list, date: str) -> dict | None:
 
     try:
         log(f'Trends: Generating with {model}...')
-        r = requests.post(
+        r = SESSION.post(
             f'https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={key}',
             json=payload,
             timeout=60
         )
         r.raise_for_status()
-        ans = r.json()['candidates'][0]['content']['parts'][0]['text']
+        ans = orjson.loads(r.content)['candidates'][0]['content']['parts'][0]['text']
 
         # Parse JSON response
         ans = ans.strip()
@@ -682,7 +1548,7 @@ def _llm_gemini_trends(articles: list, date: str) -> dict | None:
             ans = ans.rsplit('```', 1)[0]
         ans = ans.strip()
 
-        trends_data = json.loads(ans)
+        trends_data = orjson.loads(ans)
         log(f'Trends: Generated {len(trends_data.get("meta_trends", []))} trends')
         return trends_data
     except Exception as ex:
@@ -690,7 +1556,7 @@ def _llm_gemini_trends(articles: list, date: str) -> dict | None:
         return None
 
 
-def generate_trends_json(enriched_items: list, date: str) -> None:
+def generate_trends_json(enriched_items: list, date: str, generated_at: str = None) -> None:
     """trends.json を生成"""
     # 半導体関連記事のみをフィルタ
     semi_items = [it for it in enriched_items if it.get('field')]
@@ -711,7 +1577,7 @@ def generate_trends_json(enriched_items: list, date: str) -> None:
 
     # 出力データ構築
     output = {
-        'generated_at': datetime.now(JST).isoformat(),
+        'generated_at': generated_at or datetime.now(JST).isoformat(),
         'date': date,
         'meta_trends': trends_data.get('meta_trends', []),
         'market_signals': trends_data.get('market_signals', {'bullish': [], 'bearish': [], 'neutral': []}),
@@ -719,10 +1585,90 @@ def generate_trends_json(enriched_items: list, date: str) -> None:
     }
 
     # 保存
-    with open(os.path.join(NEWS_DIR, 'trends.json'), 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    write_bytes(os.path.join(NEWS_DIR, 'trends.json'), orjson.dumps(output, option=orjson.OPT_INDENT_2))
     log(f'trends.json: {len(output.get("meta_trends", []))} trends generated')
 
+# --- enrichment -------------------------------------------
+
+def _build_item(it, body, llm, info):
+    """抽出本文・LLM結果・analyze() の判定結果から出力用の記事dictを組み立てる"""
+    stars = info['stars']
+    category = (llm and llm.get('category')) or info['cats'][0]
+
+    blurb = (llm and llm.get('blurb')) or (body[:120] + '…' if body else it['summary'][:120])
+    stars_out = int((llm and llm.get('stars')) or stars)
+    # 生成された要約で再スコア
+    _, stars2 = score({'title': it['title'], 'summary': blurb, 'published': it['published'][:10]})
+    stars_out = max(stars_out, stars2)
+
+    item_out = {
+        'title': it['title'],
+        'blurb': blurb,
+        'category': category,
+        'date': it['published'][:10],
+        'stars': stars_out,
+        'source': {'name': it['source_name'], 'url': it['url']},
+        'field': info['field']  # 半導体分野dict: {'primary':..., 'device':..., 'process':..., 'market':..., 'industry':...} または None
+    }
+    # SNS向けの明示的な著者情報
+    if category == 'sns' or (it.get('source_name') == 'x.com'):
+        handle = it.get('author_handle') or RE_X_HANDLE.sub(r'\1', it['url'])
+        if handle and not handle.startswith('@'):
+            handle = '@' + handle
+        item_out['sns'] = {
+            'handle': handle,
+            'display_name': it.get('author_display') or '',
+            'posted_at': it.get('published')
+        }
+        # 出典の表示名はハンドルに
+        item_out['source'] = {'name': handle or 'X', 'url': it['url']}
+        item_out['category'] = 'sns'
+    return item_out
+
+
+def _enrich_batch(chunk):
+    """本文抽出 → LLM要約（まとめて1回） → 分類・スコアリングを記事のまとまり単位で実行"""
+    # 分類・分野判定・スコア（タイトル+RSS要約のみで判定できるので先に行う）
+    infos = [analyze(it) for it in chunk]
+    # NEWS_LLM_ONLY_MATCHED=1 のときは分野キーワードに当たらない記事の本文取得・LLM要約を省く
+    targets = [i for i, info in enumerate(infos) if info['field'] or not LLM_ONLY_MATCHED]
+    bodies = [''] * len(chunk)
+    llms = [None] * len(chunk)
+    # キャッシュ済みの記事、星が NEWS_MIN_STARS_LLM 未満の記事は本文取得もLLM呼び出しも行わない
+    misses = []
+    for i in targets:
+        llms[i] = _get_cached_llm_response(chunk[i]['title'], chunk[i]['url'])
+        if llms[i] is None and infos[i]['stars'] >= MIN_STARS_LLM:
+            misses.append(i)
+    miss_set = set(misses)
+    dead = set()
+    for i, it in enumerate(chunk):
+        url = it['url']
+        # 直近でリンク切れだったURLは取り直さない（否定キャッシュ）
+        if is_dead_link(url):
+            dead.add(i)
+            continue
+        if i in miss_set:
+            body = extract_text(url)
+            if body is None:
+                dead.add(i)
+            else:
+                bodies[i] = body
+        elif not link_ok(url):
+            # 本文取得を省いた記事もリンク確認だけは行う
+            dead.add(i)
+    misses = [i for i in misses if i not in dead]
+    if misses:
+        results = llm_summarize_batch([(chunk[i]['title'], bodies[i] or chunk[i]['summary'], chunk[i]['url']) for i in misses])
+        for i, r in zip(misses, results):
+            llms[i] = r
+            if r is not None:
+                _save_cached_llm_response(chunk[i]['title'], chunk[i]['url'], r)
+    # リンク切れと分かった記事は落とす
+    return [_build_item(it, body, llm, info)
+            for i, (it, body, llm, info) in enumerate(zip(chunk, bodies, llms, infos)) if i not in dead]
+
+
 # --- main -------------------------------------------------
 
 def main():
@@ -733,13 +1679,7 @@ def main():
     items = []
     only_sheets = os.getenv('NEWS_ONLY_SHEETS') == '1'
     if not only_sheets:
-        for f in feeds:
-            try:
-                items.extend(fetch_feed(f))
-            except Exception as ex:
-                log('feed err', f, ex)
-            if time.time() - start_time > GLOBAL_TIMEOUT_SEC:
-                break
+        items.extend(fetch_feeds_parallel(feeds, start_time))
 
     # SNS
     if not only_sheets:
@@ -748,34 +1688,29 @@ def main():
         if time.time() - start_time <= GLOBAL_TIMEOUT_SEC:
             items.extend(fetch_x_rss(x_rss_base, x_rss_users))
 
+    save_feed_cache()
+
     # Google Sheets
-    for s in (sheets or []):
-        try:
-            sid = s.get('id')
-            gid = s.get('gid', 0)
-            mapping = s.get('mapping')
-            rows = fetch_google_sheet_csv(sid, gid)
-            items.extend(rows_to_items_from_sheet(rows, mapping))
-        except Exception as ex:
-            log('sheet fetch fail', ex)
+    items.extend(fetch_sheets_parallel(sheets))
 
     # Manual TSV fallback
     manual_rows = load_manual_sns(os.path.join(ROOT, 'news', 'manual_sns.tsv'))
     if manual_rows:
         items.extend(rows_to_items_from_sheet(manual_rows, {'date':0,'handle':1,'text':2,'url':4}))
 
-    # dedup by URL & title
-    uniq = []
-    seen = set()
+    # dedup by URL & title（URLは取得時に canon_url 済み。先勝ちで残す）
+    uniq_map = {}
+    title_seen = set()
     for it in items:
-        url = canon_url(it['url'])
-        key = (url, it['title'].strip().lower())
-        if key in seen:
+        url = it['url']
+        title = it['title'].strip().lower()
+        if url in uniq_map or title in title_seen:
             continue
-        seen.add(key)
-        uniq.append(it)
-        if FAST_MODE and len(uniq) >= 200:
+        uniq_map[url] = it
+        title_seen.add(title)
+        if FAST_MODE and len(uniq_map) >= 200:
             break
+    uniq = list(uniq_map.values())
 
     # title-similarity prune
     pruned = []
@@ -783,67 +1718,54 @@ def main():
         # 類似判定はスキップして速度優先
         pruned = uniq[:]
     else:
-        for it in uniq:
-            if any(very_similar(it['title'], p['title']) for p in pruned):
-                continue
-            pruned.append(it)
-            if time.time() - start_time > GLOBAL_TIMEOUT_SEC:
-                break
-
-    # verify links quickly
-    verified = pruned if FAST_MODE else [it for it in pruned if head_ok(it['url'])]
+        pruned = prune_similar_titles(uniq, start_time)
 
     # enrich with text, llm/fallback summary, score, category
     enriched = []
-    for it in verified:
-        body = extract_text(it['url'])
-        llm = llm_summarize(it['title'], body or it['summary'], it['url'])
-        cats = classify(it)
-        base, stars = score(it)
-        category = (llm and llm.get('category')) or cats[0]
-        # 半導体分野判定
-        semi_field = classify_field(it)
-
-        item_out = {
-            'title': it['title'],
-            'blurb': (llm and llm.get('blurb')) or (body[:120] + '…' if body else it['summary'][:120]),
-            'category': category,
-            'date': it['published'][:10],
-            'stars': int((llm and llm.get('stars')) or stars),
-            'source': {'name': it['source_name'], 'url': it['url']},
-            'field': semi_field  # 半導体分野dict: {'primary':..., 'device':..., 'process':..., 'market':..., 'industry':...} または None
-        }
-        # SNS向けの明示的な著者情報
-        if category == 'sns' or (it.get('source_name') == 'x.com'):
-            handle = it.get('author_handle') or re.sub(r'^https?://x\.com/([^/]+)/.*', r'\1', it['url'])
-            if handle and not handle.startswith('@'):
-                handle = '@' + handle
-            item_out['sns'] = {
-                'handle': handle,
-                'display_name': it.get('author_display') or '',
-                'posted_at': it.get('published')
-            }
-            # 出典の表示名はハンドルに
-            item_out['source'] = {'name': handle or 'X', 'url': it['url']}
-            item_out['category'] = 'sns'
-        enriched.append(item_out)
-        if FAST_MODE and len(enriched) >= 200:
-            break
-        if time.time() - start_time > GLOBAL_TIMEOUT_SEC:
-            break
+    sources_set = set()
+    try:
+        workers = int(os.getenv('NEWS_ENRICH_WORKERS', '8'))
+    except Exception:
+        workers = 8
+    try:
+        batch_size = max(1, int(os.getenv('NEWS_LLM_BATCH_SIZE', '8')))
+    except Exception:
+        batch_size = 8
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        # 本文取得とLLM呼び出しは I/O 待ちなので並列化（出力順は入力順を維持）
+        # LLMは NEWS_LLM_BATCH_SIZE 件ずつまとめて1リクエストにする
+        chunks = [pruned[i:i+batch_size] for i in range(0, len(pruned), batch_size)]
+        futures = [pool.submit(_enrich_batch, c) for c in chunks]
+        for fut in futures:
+            try:
+                batch = fut.result()
+            except Exception as ex:
+                log('enrich err', ex)
+            else:
+                enriched.extend(batch)
+                # stats.json の出典一覧は受け取りながら集める
+                sources_set.update(it['source']['name'] for it in batch)
+            if FAST_MODE and len(enriched) >= 200:
+                break
+            if time.time() - start_time > GLOBAL_TIMEOUT_SEC:
+                break
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
 
-    # score again using produced blurb/title
-    for it in enriched:
-        base, stars = score({'title': it['title'], 'summary': it['blurb'], 'published': it['date'], 'source_name': it['source']['name']})
-        it['stars'] = max(it['stars'], stars)
+    close_llm_cache()
 
     # age-based filter for freshness (default 24h, widen to 48h if empty)
+    # 基準時刻は1回だけ取り、同じ日付文字列の経過時間は使い回す（48h への拡張時も再計算しない）
+    now_jst = datetime.now(JST)
+
+    @functools.lru_cache(maxsize=4096)
     def hours_since(datestr: str) -> float:
         try:
-            dt = dateparser.parse(datestr).astimezone(JST)
+            dt = parse_dt(datestr).astimezone(JST)
         except Exception:
-            dt = datetime.now(JST)
-        return max(0.0, (datetime.now(JST) - dt).total_seconds()/3600)
+            dt = now_jst
+        return max(0.0, (now_jst - dt).total_seconds()/3600)
 
     try:
         max_age_h = float(os.getenv('NEWS_MAX_AGE_HOURS', '24'))
@@ -856,29 +1778,62 @@ def main():
         fresh = [it for it in enriched if hours_since(it['date']) <= 48.0]
 
     # split into sections and pick上位
+    # セクション・ハイライト候補・分野別の振り分けを1回の走査でまとめて行う
     sections = {'business': [], 'tools': [], 'company': [], 'sns': []}
+    non_sns_items = []
+    semi_items = []  # 半導体関連記事のみ（field dictが存在する記事）
+    # 分野ごとの (全記事, SNS以外, news/tech/market) を FIELD_INDEX の番号で引く
+    field_buckets = [([], [], {'news': [], 'tech': [], 'market': []}) for _ in ALL_FIELDS]
     for it in (fresh or enriched):
-        sections.setdefault(it['category'], sections['company']).append(it)
+        cat = it['category']
+        # 未知のカテゴリは company に寄せる（setdefault だと company のリストが別キーにも登録され重複出力される）
+        sections.get(cat, sections['company']).append(it)
+        if cat != 'sns':
+            non_sns_items.append(it)
+        # _build_item は必ず 'field' を持たせ、classify_field の結果は必ず 'primary' を持つので直接引く
+        field_dict = it['field']
+        if not field_dict:
+            continue
+        semi_items.append(it)
+        idx = FIELD_INDEX.get(field_dict['primary'])
+        if idx is None:
+            continue
+        f_items, f_non_sns, f_sections = field_buckets[idx]
+        f_items.append(it)
+        if cat != 'sns':
+            f_non_sns.append(it)
+        # カテゴリを半導体向けセクションにマッピング（company, sns, その他 → news）
+        if cat == 'tools':
+            f_sections['tech'].append(it)
+        elif cat == 'business':
+            f_sections['market'].append(it)
+        else:
+            f_sections['news'].append(it)
 
-    # 並べ替え（stars→新しさ）
-    def sortkey(x):
+    # 並べ替え（stars→新しさ）。キーは記事ごとに1回だけ作り、全セクション・分野別の並べ替えで使い回す
+    # （出力dictに余計なキーを混ぜないよう id() で引く）
+    sort_keys = {}
+    for x in enriched:
         try:
-            dt = dateparser.parse(x['date'])
+            dt = parse_dt(x['date'])
         except Exception:
-            dt = datetime.now(JST)
-        return (-x['stars'], dt)
+            dt = now_jst
+        sort_keys[id(x)] = (-x['stars'], dt)
+
+    def sortkey(x):
+        return sort_keys[id(x)]
 
     try:
         max_per = int(os.getenv('NEWS_MAX_PER_SECTION', '30'))
     except Exception:
         max_per = 30
+    # 上位 max_per 件だけ要るので全件ソートせずヒープで取り出す（安定性は sorted()[:n] と同じ）
     for k in sections:
-        sections[k] = sorted(sections[k], key=sortkey)[:max_per]
+        sections[k] = heapq.nsmallest(max_per, sections[k], key=sortkey)
 
     # highlight = SNSを除く全体から最高スコア（鮮度フィルタ後）
-    non_sns_items = [x for x in (fresh or enriched) if x.get('category') != 'sns']
-    all_items = sorted(non_sns_items, key=lambda x: (-x['stars']))
-    hl = all_items[0] if all_items else None
+    # 先頭の1件だけ要るので max()（同点は先勝ちで、安定ソートの先頭と同じ）
+    hl = max(non_sns_items, key=lambda x: x['stars'], default=None)
     highlight = None
     if hl:
         highlight = {
@@ -889,71 +1844,35 @@ def main():
             'sources': [hl['source']]
         }
 
+    # 出力ファイル共通の生成時刻（ファイルごとに取り直さない）
+    generated_dt = datetime.now(JST)
+    generated_at = generated_dt.isoformat()
     out = {
-        'generated_at': datetime.now(JST).isoformat(),
+        'generated_at': generated_at,
         'highlight': highlight,
         'sections': sections
     }
 
-    today = datetime.now(JST).strftime('%Y-%m-%d')
-    with open(os.path.join(NEWS_DIR, 'latest.json'), 'w', encoding='utf-8') as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
-    with open(os.path.join(NEWS_DIR, f'{today}.json'), 'w', encoding='utf-8') as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    today = generated_dt.strftime('%Y-%m-%d')
+    # 出力ファイルは (パス, バイト列) として集め、最後にまとめて並列に書く
+    # 同じ内容なので1回だけエンコードして両方に書く
+    payload = orjson.dumps(out, option=orjson.OPT_INDENT_2)
+    payloads = [(os.path.join(NEWS_DIR, name), payload) for name in ('latest.json', f'{today}.json')]
 
     # --- 半導体分野別JSON出力 ---
-    # 半導体関連記事のみをフィルタリング（field dictが存在する記事）
-    semi_items = [it for it in (fresh or enriched) if it.get('field')]
-
-    # 全分野のリスト（primary分類に使用される可能性のあるすべての分野）
-    ALL_FIELDS = [
-        # デバイス種類
-        'power', 'memory', 'logic', 'analog', 'image',
-        # 市場用途
-        'ai', 'automotive', 'datacenter', 'industrial',
-        # 業界構造
-        'foundry', 'fabless', 'idm', 'geopolitics',
-        # 製造工程
-        'frontend', 'backend', 'miniaturization', 'equipment', 'wafer',
-        # 汎用
-        'general'
-    ]
-
-    # primary分野でグループ化
-    field_items = {f: [] for f in ALL_FIELDS}
-    for it in semi_items:
-        field_dict = it.get('field')
-        if field_dict and isinstance(field_dict, dict):
-            primary = field_dict.get('primary')
-            if primary and primary in field_items:
-                field_items[primary].append(it)
-
-    # 分野別のセクション分割とJSON出力
-    for field_name, items in field_items.items():
+    # 分野別のセクション分割（news/tech/market の3セクション、振り分けは上で済ませてある）とJSON出力
+    field_items = {}
+    for field_name, (items, f_non_sns, field_sections) in zip(ALL_FIELDS, field_buckets):
         if not items:
             continue
-
-        # セクション分割（news/tech/market の3セクション）
-        field_sections = {'news': [], 'tech': [], 'market': []}
-        for it in items:
-            cat = it.get('category', 'company')
-            # カテゴリを半導体向けセクションにマッピング
-            if cat in ('tools',):
-                field_sections['tech'].append(it)
-            elif cat in ('business',):
-                field_sections['market'].append(it)
-            else:
-                # company, sns, その他 → news
-                field_sections['news'].append(it)
+        field_items[field_name] = items
 
         # 各セクションをソート
         for k in field_sections:
-            field_sections[k] = sorted(field_sections[k], key=sortkey)[:max_per]
+            field_sections[k] = heapq.nsmallest(max_per, field_sections[k], key=sortkey)
 
         # ハイライト選出（該当分野から最高スコア）
-        field_non_sns = [x for x in items if x.get('category') != 'sns']
-        field_all = sorted(field_non_sns, key=lambda x: (-x['stars']))
-        field_hl = field_all[0] if field_all else None
+        field_hl = max(f_non_sns, key=lambda x: x['stars'], default=None)
         field_highlight = None
         if field_hl:
             field_highlight = {
@@ -965,36 +1884,54 @@ def main():
             }
 
         field_out = {
-            'generated_at': datetime.now(JST).isoformat(),
+            'generated_at': generated_at,
             'field': field_name,
             'field_label': FIELD_LABELS.get(field_name, field_name),
             'highlight': field_highlight,
             'sections': field_sections
         }
 
-        with open(os.path.join(NEWS_DIR, f'{field_name}.json'), 'w', encoding='utf-8') as f:
-            json.dump(field_out, f, ensure_ascii=False, indent=2)
+        payloads.append((os.path.join(NEWS_DIR, f'{field_name}.json'),
+                         orjson.dumps(field_out, option=orjson.OPT_INDENT_2)))
         log(f'{field_name}.json:', len(items), 'items')
 
     # --- 統計情報の生成 ---
     stats = {
-        'generated_at': datetime.now(JST).isoformat(),
+        'generated_at': generated_at,
         'date': today,
         'total_items': len(enriched),
         'semiconductor_items': len(semi_items),
-        'by_field': {field: len(items) for field, items in field_items.items() if items},
-        'sources': sorted(list(set(it['source']['name'] for it in enriched))),
+        'by_field': {field: len(items) for field, items in field_items.items()},
+        'sources': sorted(sources_set),
         'sections': {k: len(v) for k, v in sections.items()}
     }
-    with open(os.path.join(NEWS_DIR, 'stats.json'), 'w', encoding='utf-8') as f:
-        json.dump(stats, f, ensure_ascii=False, indent=2)
+    payloads.append((os.path.join(NEWS_DIR, 'stats.json'), orjson.dumps(stats, option=orjson.OPT_INDENT_2)))
+
+    # 書き込みは I/O 待ちなのでまとめて並列に行う（失敗は従来どおり例外として上げる）
+    with ThreadPoolExecutor(max_workers=min(8, len(payloads))) as pool:
+        list(pool.map(lambda pb: write_bytes(*pb), payloads))
     log('stats.json: generated')
 
     # --- 投資家向けトレンド分析 ---
-    generate_trends_json(enriched, today)
+    generate_trends_json(enriched, today, generated_at)
 
     log('DONE', len(enriched), 'items total,', len(semi_items), 'semiconductor-related')
 
+# 例外時に書く最小限の latest.json。可変なのは generated_at と error だけなので骨組みは固定のバイト列にしておく
+FALLBACK_LATEST_TEMPLATE = (
+    b'{\n'
+    b'  "generated_at": %s,\n'
+    b'  "highlight": null,\n'
+    b'  "sections": {\n'
+    b'    "business": [],\n'
+    b'    "tools": [],\n'
+    b'    "company": [],\n'
+    b'    "sns": []\n'
+    b'  },\n'
+    b'  "error": %s\n'
+    b'}'
+)
+
 if __name__ == '__main__':
     try:
         main()
@@ -1005,14 +1942,8 @@ if __name__ == '__main__':
         traceback.print_exc()
         # Create minimal output so downstream steps don't fail
         os.makedirs(NEWS_DIR, exist_ok=True)
-        fallback = {
-            'generated_at': datetime.now(JST).isoformat(),
-            'highlight': None,
-            'sections': {'business': [], 'tools': [], 'company': [], 'sns': []},
-            'error': str(ex)
-        }
-        with open(os.path.join(NEWS_DIR, 'latest.json'), 'w', encoding='utf-8') as f:
-            json.dump(fallback, f, ensure_ascii=False, indent=2)
+        fallback = FALLBACK_LATEST_TEMPLATE % (orjson.dumps(datetime.now(JST).isoformat()), orjson.dumps(str(ex)))
+        write_bytes(os.path.join(NEWS_DIR, 'latest.json'), fallback)
         log('Created fallback latest.json due to error')
         # Exit with 0 to not fail the workflow
         exit(0)
\ No newline at end of file